@@ -58,7 +58,7 @@ beta_schedule_epoch = torch.tensor([-1,  10,  20,  30,  40, 50])
 
 loss_iter = []
 for i in range(0, 60):
-    model.cell.geom.beta = beta_schedule[beta_schedule_epoch<i][-1]
+    model.cell.geom.beta = float(beta_schedule[beta_schedule_epoch<i][-1])
 
     def closure():
         optimizer.zero_grad()
@@ -68,7 +68,6 @@ for i in range(0, 60):
         return loss
 
     loss = optimizer.step(closure)
-    model.cell.geom.constrain_to_design_region()
     print("Epoch: {} -- Loss: {}".format(i, loss))
     loss_iter.append(loss.item())
 
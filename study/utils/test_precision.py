@@ -0,0 +1,52 @@
+"""Compare a simulation with reduced precision fields against one with float32 fields over a full sequence.
+"""
+
+import numpy as np
+import skimage
+import torch
+import wavetorch
+
+device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+
+domain_shape = (151, 151)
+dt = 0.707
+h  = 1.0
+Nt = 1000
+
+domain = torch.zeros(domain_shape)
+rr, cc = skimage.draw.circle(int(domain_shape[0]/2), int(domain_shape[1]/2), 30)
+domain[rr, cc] = 1
+
+geom  = wavetorch.WaveGeometryFreeForm(domain_shape, h, c0=1.0, c1=0.5, rho=domain)
+cell  = wavetorch.WaveCell(dt, geom)
+src   = wavetorch.WaveLineSource(25, 50, 25, 100)
+probe = [wavetorch.WaveIntensityProbe(125, 100),
+         wavetorch.WaveIntensityProbe(125, 75),
+         wavetorch.WaveIntensityProbe(125, 50)]
+
+model = wavetorch.WaveRNN(cell, src, probe)
+model.to(device)
+
+t = np.arange(0, Nt*dt, dt)[:Nt]
+omega1 = 2*np.pi*1/dt/15
+X = np.sin(omega1*t) * t / (1 + t)
+X = torch.tensor(X, dtype=torch.get_default_dtype(), device=device).unsqueeze(0)
+
+def run(field_dtype):
+    model.field_dtype = field_dtype
+    model.zero_grad()
+    u = model(X)
+    loss = torch.nn.functional.cross_entropy(wavetorch.utils.normalize_power(u.sum(dim=1)), torch.tensor([2], device=device))
+    loss.backward()
+    return u.detach(), wavetorch.utils.normalize_power(u.sum(dim=1)).detach(), geom.rho_raw.grad.clone()
+
+u_ref, p_ref, g_ref = run(None)
+
+for field_dtype in [torch.float16, torch.bfloat16]:
+    u, p, g = run(field_dtype)
+    print("%s: probe signal rel. error %.3e | integrated power rel. error %.3e | gradient rel. error %.3e | same class %s" % (
+        field_dtype,
+        (u - u_ref).norm().item() / u_ref.norm().item(),
+        (p - p_ref).norm().item() / p_ref.norm().item(),
+        (g - g_ref).norm().item() / g_ref.norm().item(),
+        p.argmax().item() == p_ref.argmax().item()))
@@ -26,6 +26,8 @@ parser.add_argument('--num_threads', type=int, default=4,
                     help='Number of threads to use')
 parser.add_argument('--use-cuda', action='store_true',
                     help='Use CUDA to perform computations')
+parser.add_argument('--compile', action='store_true',
+                    help='Compile the wave cell with torch.compile (requires pytorch >= 2.2) to fuse the operations of each time step')
 parser.add_argument('--name', type=str, default=time.strftime('%Y%m%d%H%M%S'),
                     help='Name to use when saving or loading the model file. If not specified when saving a time and date stamp is used')
 parser.add_argument('--savedir', type=str, default='./study/',
@@ -34,6 +36,9 @@ parser.add_argument('--savedir', type=str, default='./study/',
 if __name__ == '__main__':
     args = parser.parse_args()
 
+    if args.compile and not hasattr(torch.nn.Module, 'compile'):
+        parser.error('--compile requires pytorch >= 2.2, but pytorch %s is installed' % torch.__version__)
+
     if args.use_cuda and torch.cuda.is_available():
         args.dev = torch.device('cuda')
     else:
@@ -55,35 +60,47 @@ if __name__ == '__main__':
 
     N_classes = len(cfg['data']['vowels'])
 
-    X, Y, _ = wavetorch.data.load_all_vowels(cfg['data']['vowels'], gender=cfg['data']['gender'], sr=cfg['data']['sr'], normalize=True, max_samples=cfg['training']['max_samples'], random_state=cfg['seed'])
+    X, Y, _ = wavetorch.data.load_all_vowels(cfg['data']['vowels'], gender=cfg['data']['gender'], sr=cfg['data']['sr'], normalize=True, max_samples=cfg['training']['max_samples'], random_state=cfg['seed'], n_jobs=args.num_threads)
 
     skf = StratifiedKFold(n_splits=cfg['training']['N_folds'], random_state=cfg['seed'], shuffle=True)
-    samps = [y.argmax().item() for y in Y]
+    samps = torch.stack(Y).argmax(dim=1).tolist()
+
+    # Pad all of the samples once, up front, so that each fold only has to index into the padded tensors. Each fold is
+    # trimmed to the length of its longest sample, giving the same sequences as padding the fold on its own
+    # The training samples are windowed, while the testing samples use the full sequences
+    if cfg['data']['window_size']:
+        X_windowed = [wavetorch.utils.window_data(x, cfg['data']['window_size']) for x in X]
+    else:
+        X_windowed = X
+
+    len_windowed = torch.tensor([len(x) for x in X_windowed])
+    len_padded = torch.tensor([len(x) for x in X])
+
+    X_windowed = torch.nn.utils.rnn.pad_sequence(X_windowed, batch_first=True)
+    X_padded = torch.nn.utils.rnn.pad_sequence(X, batch_first=True)
+    Y_all = torch.stack(Y)
 
     history = None
     history_model_state = []
     for num, (train_index, test_index) in enumerate(skf.split(np.zeros(len(samps)), samps)):
         if cfg['training']['cross_validation']: print("Cross Validation Fold %2d/%2d" % (num+1, cfg['training']['N_folds']))
 
-        if cfg['data']['window_size']:
-            x_train = torch.nn.utils.rnn.pad_sequence([wavetorch.utils.window_data(X[i], cfg['data']['window_size']) for i in train_index], batch_first=True)
-        else:
-            x_train = torch.nn.utils.rnn.pad_sequence([X[i] for i in train_index], batch_first=True)
-
-        x_test = torch.nn.utils.rnn.pad_sequence([X[i] for i in test_index], batch_first=True)
-        y_train = torch.nn.utils.rnn.pad_sequence([Y[i] for i in train_index], batch_first=True)
-        y_test = torch.nn.utils.rnn.pad_sequence([Y[i] for i in test_index], batch_first=True)
+        train_index = torch.from_numpy(train_index)
+        test_index = torch.from_numpy(test_index)
 
-        x_train = x_train.to(args.dev)
-        x_test  = x_test.to(args.dev)
-        y_train = y_train.to(args.dev)
-        y_test  = y_test.to(args.dev)
+        x_train = X_windowed[train_index, :len_windowed[train_index].max().item()]
+        x_test = X_padded[test_index, :len_padded[test_index].max().item()]
+        y_train = Y_all[train_index]
+        y_test = Y_all[test_index]
 
+        # The datasets stay on the CPU; with CUDA the batches are pinned so that wavetorch.train() can copy them to the
+        # device asynchronously
         train_ds = TensorDataset(x_train, y_train)
         test_ds  = TensorDataset(x_test, y_test)
 
-        train_dl = DataLoader(train_ds, batch_size=cfg['training']['batch_size'], shuffle=True)
-        test_dl  = DataLoader(test_ds, batch_size=cfg['training']['batch_size'])
+        pin_memory = args.dev.type == 'cuda'
+        train_dl = DataLoader(train_ds, batch_size=cfg['training']['batch_size'], shuffle=True, pin_memory=pin_memory)
+        test_dl  = DataLoader(test_ds, batch_size=cfg['training']['batch_size'], pin_memory=pin_memory)
 
         ### Define model
         probes = setup_probe_coords(
@@ -118,9 +135,19 @@ if __name__ == '__main__':
             c_nl=cfg['geom']['nonlinearity']['cnl']
         )
 
-        model = wavetorch.WaveRNN(cell, source, probes)
+        model = wavetorch.WaveRNN(cell, source, probes,
+            checkpoint_steps=cfg['training'].get('checkpoint_steps'),
+            field_dtype=wavetorch.utils.field_dtype(cfg.get('field_dtype'))
+        )
         model.to(args.dev)
 
+        if args.compile:
+            # Only the cell, i.e. a single time step, is compiled: compiling the whole model would unroll the time loop
+            # and recompile for every sequence length. Compiling in place leaves the state dict used for saving unchanged.
+            # The default mode is used since CUDA graphs (mode='reduce-overhead') cannot replay a step whose inputs are
+            # the outputs of the previous step kept alive by autograd
+            model.cell.compile()
+
         ### Train
         optimizer = torch.optim.Adam(model.parameters(), lr=cfg['training']['lr'])
         criterion = torch.nn.CrossEntropyLoss()
@@ -6,22 +6,31 @@ from .utils import to_tensor
 
 
 def saturable_damping(u, uth, b0):
-    return b0 / (1 + torch.abs(u / uth).pow(2))
+    u_rel = u / uth
+    return b0 / (1 + u_rel * u_rel)
 
 
-def _time_step(b, c, y1, y2, dt, h):
-    y = torch.mul((dt**-2 + b * dt**-1).pow(-1),
-                  (2 / dt**2 * y1 - torch.mul((dt**-2 - b * dt**-1), y2)
-                   + torch.mul(c.pow(2), _laplacian(y1, h)))
-                  )
-    return y
+def _time_step_coeffs(b, dt):
+    """Coefficients `(A, B)` of the time step, which depend only on the damping"""
+    return (dt**-2 + b * dt**-1).reciprocal(), dt**-2 - b * dt**-1
+
+
+@torch.jit.script
+def _time_step_update(A, B, c, y1, y2, lap_y1, dt):
+    """Pointwise part of the time step, scripted so that it runs as a single fused kernel"""
+    return A * (2 * dt**-2 * y1 - B * y2 + c * c * lap_y1)
+
+
+def _time_step(b, c, y1, y2, dt, h, coeffs=None):
+    A, B = coeffs if coeffs is not None else _time_step_coeffs(b, dt)
+    return _time_step_update(A, B, c, y1, y2, _laplacian(y1, h), dt)
 
 
 class TimeStep(torch.autograd.Function):
     @staticmethod
-    def forward(ctx, b, c, y1, y2, dt, h):
+    def forward(ctx, b, c, y1, y2, dt, h, coeffs):
         ctx.save_for_backward(b, c, y1, y2, dt, h)
-        return _time_step(b, c, y1, y2, dt, h)
+        return _time_step(b, c, y1, y2, dt, h, coeffs)
 
     @staticmethod
     def backward(ctx, grad_output):
@@ -29,19 +38,24 @@ class TimeStep(torch.autograd.Function):
 
         grad_b = grad_c = grad_y1 = grad_y2 = grad_dt = grad_h = None
 
+        # Shared by all of the gradients below
+        inv_bdt = (b * dt + 1).reciprocal()
+
+        if ctx.needs_input_grad[0] or ctx.needs_input_grad[1]:
+            lap_y1 = _laplacian(y1, h)
         if ctx.needs_input_grad[0]:
-            grad_b = - (dt * b + 1).pow(-2) * dt * (
-                        c.pow(2) * dt**(2) * _laplacian(y1, h) + 2 * y1 - 2 * y2) * grad_output
+            grad_b = - inv_bdt * inv_bdt * dt * (
+                        c * c * dt**(2) * lap_y1 + 2 * y1 - 2 * y2) * grad_output
         if ctx.needs_input_grad[1]:
-            grad_c = (b * dt + 1).pow(-1) * (2 * c * dt**(2) * _laplacian(y1, h)) * grad_output
+            grad_c = inv_bdt * (2 * c * dt**(2) * lap_y1) * grad_output
         if ctx.needs_input_grad[2]:
             # grad_y1 = ( dt.pow(2) * _laplacian(c.pow(2) *grad_output, h) + 2*grad_output) * (b*dt + 1).pow(-1)
-            c2_grad = (b * dt + 1)**(-1) * c.pow(2) * grad_output
-            grad_y1 = dt**(2) * _laplacian(c2_grad, h) + 2 * grad_output * (b * dt + 1).pow(-1)
+            c2_grad = inv_bdt * c * c * grad_output
+            grad_y1 = dt**(2) * _laplacian(c2_grad, h) + 2 * grad_output * inv_bdt
         if ctx.needs_input_grad[3]:
-            grad_y2 = (b * dt - 1) * (b * dt + 1).pow(-1) * grad_output
+            grad_y2 = (b * dt - 1) * inv_bdt * grad_output
 
-        return grad_b, grad_c, grad_y1, grad_y2, grad_dt, grad_h
+        return grad_b, grad_c, grad_y1, grad_y2, grad_dt, grad_h, None
 
 
 class WaveCell(torch.nn.Module):
@@ -59,9 +73,11 @@ class WaveCell(torch.nn.Module):
         # Set values
         self.register_buffer("dt", to_tensor(dt))
         self.geom = geometry
-        self.register_buffer("satdamp_b0", to_tensor(satdamp_b0))
-        self.register_buffer("satdamp_uth", to_tensor(satdamp_uth))
-        self.register_buffer("c_nl", to_tensor(c_nl))
+        # The nonlinearity parameters are plain floats so that the branches on them in forward() are static, which
+        # lets the cell be compiled without a graph break on every time step
+        self.satdamp_b0 = float(satdamp_b0)
+        self.satdamp_uth = float(satdamp_uth)
+        self.c_nl = float(c_nl)
 
         # Validate inputs
         cmax = self.geom.cmax
@@ -76,7 +92,11 @@ class WaveCell(torch.nn.Module):
         for param in self.geom.parameters():
             yield param
 
-    def forward(self, h1, h2, c_linear, rho):
+    def linear_coeffs(self):
+        """Linear damping distribution `b` and the time step coefficients `(A, B)` for it, which do not change with time"""
+        return (self.geom.b,) + _time_step_coeffs(self.geom.b, self.dt)
+
+    def forward(self, h1, h2, c_linear, rho, coeffs_linear=None):
         """Take a step through time
 
         Parameters
@@ -89,19 +109,28 @@ class WaveCell(torch.nn.Module):
             Scalar wave speed distribution (this gets passed in to avoid generating it on each time step, saving memory for backprop)
         rho : 
             Projected density, required for nonlinear response (this gets passed in to avoid generating it on each time step, saving memory for backprop)
+        coeffs_linear :
+            Damping and time step coefficients `(b, A, B)` from `linear_coeffs()`, in the data type of the fields, used
+            when the damping is linear (this gets passed in to avoid generating it on each time step)
         """
 
         if self.satdamp_b0 > 0:
-            b = self.geom.b + rho * saturable_damping(h1, uth=self.satdamp_uth, b0=self.satdamp_b0)
+            b = self.geom.b.to(h1.dtype) + rho * saturable_damping(h1, uth=self.satdamp_uth, b0=self.satdamp_b0)
+            coeffs = None
+        elif coeffs_linear is not None:
+            # b is also needed in the field data type, as TimeStep saves it for the backward pass
+            b, A, B = coeffs_linear
+            coeffs = (A, B)
         else:
-            b = self.geom.b
+            b = self.geom.b.to(h1.dtype)
+            coeffs = None
 
         if self.c_nl != 0:
-            c = c_linear + rho * self.c_nl * h1.pow(2)
+            c = c_linear + rho * self.c_nl * h1 * h1
         else:
             c = c_linear
 
-        y = TimeStep.apply(b, c, h1, h2, self.dt, self.geom.h)
+        y = TimeStep.apply(b, c, h1, h2, self.dt, self.geom.h, coeffs)
         # y = _time_step(b, c, h1, h2, dt, h)
 
         return y, h1
@@ -6,6 +6,7 @@ import random
 import librosa
 import numpy as np
 import torch
+from joblib import Parallel, delayed
 from sklearn.model_selection import train_test_split
 
 
@@ -29,40 +30,43 @@ def load_vowel(file, sr=None, normalize=True):
 	return data
 
 
+def load_vowels(files, sr=None, normalize=True, n_jobs=1):
+	"""Load a list of vowel files, decoding them in parallel over `n_jobs` processes
+	"""
+	return Parallel(n_jobs=n_jobs)(delayed(load_vowel)(file, sr=sr, normalize=normalize) for file in files)
+
+
 def load_all_vowels(str_classes, gender='both', sr=None, normalize=True, dir='data/vowels/', ext='.wav',
-					max_samples=None, random_state=None):
+					max_samples=None, random_state=None, n_jobs=1):
 	"""Loads all available vowel samples associated with `str_classes` and `gender`
 
 	If `max_samples` is specified, then the *total* number of samples returned is limited to this number. In the case of
 	both genders being sampled, the vowels are equally distributed among men and women.
+
+	The files are decoded and resampled in parallel over `n_jobs` processes (-1 uses all available cores).
 	"""
 
 	assert gender in ['women', 'men', 'both'], "gender must be either 'women', 'men', or 'both'"
 
-	x_w = []
 	y_w = []
 	F_w = []
-	x_m = []
 	y_m = []
 	F_m = []
 	for i, str_class in enumerate(str_classes):
 		y = np.eye(len(str_classes))[i]
 
 		# Women
-		files = os.path.join(dir, 'w*' + str_class + ext)
-		for file in sorted(glob.glob(files)):
-			x = load_vowel(file, sr=sr, normalize=normalize)
-			F_w.append(file)
-			x_w.append(x)
-			y_w.append(y)
+		files = sorted(glob.glob(os.path.join(dir, 'w*' + str_class + ext)))
+		F_w += files
+		y_w += [y] * len(files)
 
 		# Men
-		files = os.path.join(dir, 'm*' + str_class + ext)
-		for file in sorted(glob.glob(files)):
-			x = load_vowel(file, sr=sr, normalize=normalize)
-			F_m.append(file)
-			x_m.append(x)
-			y_m.append(y)
+		files = sorted(glob.glob(os.path.join(dir, 'm*' + str_class + ext)))
+		F_m += files
+		y_m += [y] * len(files)
+
+	x_w = load_vowels(F_w, sr=sr, normalize=normalize, n_jobs=n_jobs)
+	x_m = load_vowels(F_m, sr=sr, normalize=normalize, n_jobs=n_jobs)
 
 	if max_samples is not None:
 		# Limit the number of returned samples
@@ -102,7 +106,7 @@ def load_all_vowels(str_classes, gender='both', sr=None, normalize=True, dir='da
 def select_vowel_sample(X, Y, F, y_class, ind=None):
 	"""Select a specific vowel sample from the set
 	"""
-	labels_ints = [y.argmax().item() for y in Y]
+	labels_ints = torch.stack(Y).argmax(dim=1).tolist()
 	inds_this_clss = [i for i in range(len(labels_ints)) if labels_ints[i] == y_class]
 
 	if ind is None:
@@ -70,19 +70,18 @@ class WaveGeometry(torch.nn.Module):
 		assert Ny > 2 * abs_N + 1, "The domain isn't large enough in the y-direction to fit absorbing layer. Ny = {} and N = {}".format(
 			Ny, abs_N)
 
-		b_vals = abs_sig * torch.linspace(0.0, 1.0, abs_N + 1) ** abs_p
+		def _profile(N):
+			"""Damping along one axis, ramping from zero at depth `abs_N` into the layer up to `abs_sig` at the edge"""
+			if abs_N == 0:
+				return torch.zeros(N)
+			i = torch.arange(N)
+			d = (abs_N - torch.min(i, N - 1 - i)).clamp(min=0).to(torch.get_default_dtype()) / abs_N
+			return abs_sig * d ** abs_p
 
-		b_x = torch.zeros(Nx, Ny)
-		b_y = torch.zeros(Nx, Ny)
+		b_x = _profile(Nx)
+		b_y = _profile(Ny)
 
-		if abs_N > 0:
-			b_x[0:abs_N + 1, :] = torch.flip(b_vals, [0]).repeat(Ny, 1).transpose(0, 1)
-			b_x[(Nx - abs_N - 1):Nx, :] = b_vals.repeat(Ny, 1).transpose(0, 1)
-
-			b_y[:, 0:abs_N + 1] = torch.flip(b_vals, [0]).repeat(Nx, 1)
-			b_y[:, (Ny - abs_N - 1):Ny] = b_vals.repeat(Nx, 1)
-
-		self.register_buffer("_b", torch.sqrt(b_x ** 2 + b_y ** 2))
+		self.register_buffer("_b", torch.sqrt(b_x[:, None] ** 2 + b_y[None, :] ** 2))
 
 
 class WaveGeometryHoley(WaveGeometry):
@@ -95,30 +94,35 @@ class WaveGeometryHoley(WaveGeometry):
 		self.y = torch.nn.Parameter(to_tensor(y))
 		self.r = torch.nn.Parameter(to_tensor(r))
 
-		self.register_buffer("eta", to_tensor(eta))
-		self.register_buffer("beta", to_tensor(beta))
+		# Kept as plain floats so that the projection doesn't need to read them back from the device
+		self.eta = float(eta)
+		self.beta = float(beta)
+
+		# Grid coordinates, shaped to broadcast against each other (and against a leading dimension over the holes)
+		self.register_buffer("_xv", torch.arange(0, domain_shape[0], dtype=torch.get_default_dtype()).view(1, -1, 1),
+							 persistent=False)
+		self.register_buffer("_yv", torch.arange(0, domain_shape[1], dtype=torch.get_default_dtype()).view(1, 1, -1),
+							 persistent=False)
 
 	def state_reconstruction_args(self):
-		my_args = {"eta": self.eta.item(),
-				   "beta": self.beta.item(),
+		my_args = {"eta": self.eta,
+				   "beta": self.beta,
 				   "x": deepcopy(self.x.detach()),
 				   "y": deepcopy(self.y.detach()),
 				   "r": deepcopy(self.r.detach())}
 		return {**super().state_reconstruction_args(), **my_args}
 
 	def _rho(self):
-		eta = self.eta.item()
-		beta = self.beta.item()
+		eta = self.eta
+		beta = self.beta
 
-		xv = torch.arange(0, self.domain_shape[0], dtype=torch.get_default_dtype())
-		yv = torch.arange(0, self.domain_shape[1], dtype=torch.get_default_dtype())
-		x, y = torch.meshgrid(xv, yv)
+		# Evaluate all of the holes at once, with the holes along the leading dimension
+		xi = self.x.view(-1, 1, 1)
+		yi = self.y.view(-1, 1, 1)
+		ri = self.r.view(-1, 1, 1)
 
-		rho = torch.zeros(self.domain_shape)
-
-		for i, (ri, xi, yi) in enumerate(zip(self.r, self.x, self.y)):
-			r = torch.sqrt((x-xi).pow(2) + (y-yi).pow(2))
-			rho = rho + torch.exp(-r/ri)
+		r = torch.sqrt((self._xv - xi).pow(2) + (self._yv - yi).pow(2))
+		rho = torch.exp(-r / ri).sum(dim=0)
 
 		return (np.tanh(beta * eta) + torch.tanh(beta * (rho - eta))) / (
 				np.tanh(beta * eta) + np.tanh(beta * (1 - eta)))
@@ -140,8 +144,9 @@ class WaveGeometryFreeForm(WaveGeometry):
 
 		super().__init__(domain_shape, h, c0, c1, abs_N, abs_sig, abs_p)
 
-		self.register_buffer("eta", to_tensor(eta))
-		self.register_buffer("beta", to_tensor(beta))
+		# Kept as plain floats so that the projection doesn't need to read them back from the device
+		self.eta = float(eta)
+		self.beta = float(beta)
 
 		self._init_design_region(design_region, domain_shape)
 		self._init_rho(rho, domain_shape)
@@ -151,15 +156,29 @@ class WaveGeometryFreeForm(WaveGeometry):
 		blur_kernel[rr, cc] = 1
 		blur_kernel=blur_kernel/blur_kernel.sum()
 
-		self.register_buffer("blur_kernel", blur_kernel.unsqueeze(0).unsqueeze(0))
+		blur_kernel = blur_kernel.unsqueeze(0).unsqueeze(0)
+
+		# Applying the blur blur_N times is equivalent to a single convolution with the kernel convolved with itself
+		# blur_N times, so that composite kernel is built once here. This only holds if the intermediate blurs never
+		# reach the edge of the domain, where they would be truncated by the zero padding; rho is zero in the absorbing
+		# layer, so the layer must be at least as thick as the total blur. Note that for blur_N > 1 the composite kernel
+		# takes more multiply-adds, (2 * blur_N * blur_radius + 1)^2 versus blur_N * (2 * blur_radius + 1)^2, in exchange
+		# for a single convolution
+		assert blur_N <= 1 or blur_N * blur_radius <= abs_N, "The blur must not extend beyond the absorbing layer. blur_N * blur_radius = {} and abs_N = {}".format(
+			blur_N * blur_radius, abs_N)
+
+		blur_kernel_N = torch.ones((1, 1, 1, 1), dtype=torch.get_default_dtype())
+		for i in range(blur_N):
+			blur_kernel_N = conv2d(blur_kernel_N, blur_kernel, padding=2*blur_radius)
+
+		self.register_buffer("blur_kernel", blur_kernel)
+		self.register_buffer("blur_kernel_N", blur_kernel_N)
 		self.register_buffer("blur_N", to_tensor(blur_N, dtype=torch.int))
 		self.register_buffer("blur_radius", to_tensor(blur_N, dtype=torch.int))
 
-		self.constrain_to_design_region()
-
 	def state_reconstruction_args(self):
-		my_args = {"eta": self.eta.item(),
-				   "beta": self.beta.item(),
+		my_args = {"eta": self.eta,
+				   "beta": self.beta,
 				   "design_region": deepcopy(self.design_region),
 				   "rho": deepcopy(self.rho.detach()),
 				   "blur_radius": self.blur_radius.item(),
@@ -182,42 +201,43 @@ class WaveGeometryFreeForm(WaveGeometry):
 
 		self.register_buffer("design_region", design_region)
 
+		# The density is only free inside of the design region and outside of the absorbing layer
+		design_mask = (design_region != 0) & (self.b == 0)
+		self.register_buffer("design_mask", design_mask.to(torch.get_default_dtype()))
+
 	def _init_rho(self, rho, domain_shape):
 		if isinstance(rho, torch.Tensor) | isinstance(rho, np.ndarray):
 			assert rho.shape == domain_shape
-			self.rho = torch.nn.Parameter(to_tensor(rho))
+			self.rho_raw = torch.nn.Parameter(to_tensor(rho))
 		elif isinstance(rho, str):
 			if rho == 'rand':
-				self.rho = torch.nn.Parameter(torch.round(torch.rand(domain_shape)))
+				self.rho_raw = torch.nn.Parameter(torch.round(torch.rand(domain_shape)))
 			elif rho == 'half':
-				self.rho = torch.nn.Parameter(torch.ones(domain_shape) * 0.5)
+				self.rho_raw = torch.nn.Parameter(torch.ones(domain_shape) * 0.5)
 			elif rho == 'blank':
-				self.rho = torch.nn.Parameter(torch.zeros(domain_shape))
+				self.rho_raw = torch.nn.Parameter(torch.zeros(domain_shape))
 			else:
 				raise ValueError('The domain initialization defined by `rho = %s` is invalid' % init)
 		else:
 			raise ValueError('The domain initialization is invalid')
 
-	def constrain_to_design_region(self):
-		"""Clip the wave speed to its background value outside of the design region."""
-		with torch.no_grad():
-			self.rho[self.design_region == 0] = 0.0
-			self.rho[self.b > 0] = 0.0
+	@property
+	def rho(self):
+		"""Density, fixed to its background value of zero outside of the design region and in the absorbing layer
+
+		Masking the trainable parameter, rather than clipping it after each optimization step, means that the cells
+		outside of the design region never receive a gradient.
+		"""
+		return self.rho_raw * self.design_mask
 
 	def _apply_blur(self, rho):
 		"""Applies the blur parameterization operator"""
-		blur_N = self.blur_N.item()
-		blur_radius = self.blur_radius.item()
-
-		for i in range(blur_N):
-			rho = conv2d(rho.unsqueeze(0).unsqueeze(0), self.blur_kernel, padding=self.blur_kernel.shape[-1]//2).squeeze() 
-
-		return rho
+		return conv2d(rho.unsqueeze(0).unsqueeze(0), self.blur_kernel_N, padding=self.blur_kernel_N.shape[-1]//2).squeeze()
 
 	def _apply_projection(self, rho):
 		"""Applies the projection parameterization operator"""
-		eta = self.eta.item()
-		beta = self.beta.item()
+		eta = self.eta
+		beta = self.beta
 		return (np.tanh(beta * eta) + torch.tanh(beta * (rho - eta))) / (
 				np.tanh(beta * eta) + np.tanh(beta * (1 - eta)))
 
@@ -11,8 +11,18 @@ class WaveProbe(torch.nn.Module):
 		self.register_buffer('x', to_tensor(x, dtype=torch.int64))
 		self.register_buffer('y', to_tensor(y, dtype=torch.int64))
 
+		# Linear index into the flattened field, built on the first forward once the width of the field is known
+		self.register_buffer('flat_ind', None, persistent=False)
+		self._flat_ind_width = None
+
 	def forward(self, x):
-		return x[:, self.x, self.y]
+		# Gather from the flattened field with a single linear index rather than a two-tensor advanced index
+		if self._flat_ind_width != x.size(-1):
+			self.flat_ind = self.x * x.size(-1) + self.y
+			self._flat_ind_width = x.size(-1)
+		# The probe values are returned in the default data type, so that squaring them and summing them over time is
+		# done at full precision even when the fields are simulated in a reduced precision type
+		return x.flatten(1)[:, self.flat_ind].to(torch.get_default_dtype())
 
 	def plot(self, ax, color='k'):
 		marker, = ax.plot(self.x.numpy(), self.y.numpy(), 'o', markeredgecolor=color, markerfacecolor='none', markeredgewidth=1.0, markersize=4)
@@ -24,4 +34,5 @@ class WaveIntensityProbe(WaveProbe):
 		super().__init__(x, y)
 
 	def forward(self, x):
-		return super().forward(x).pow(2)
+		u = super().forward(x)
+		return u * u
@@ -1,8 +1,9 @@
 import torch
+from torch.utils.checkpoint import checkpoint
 
 
 class WaveRNN(torch.nn.Module):
-	def __init__(self, cell, sources, probes=[]):
+	def __init__(self, cell, sources, probes=[], checkpoint_steps=None, field_dtype=None):
 
 		super().__init__()
 
@@ -18,6 +19,59 @@ class WaveRNN(torch.nn.Module):
 		else:
 			self.probes = torch.nn.ModuleList([probes])
 
+		# If set, the hidden state is only stored every `checkpoint_steps` time steps during training and the steps in
+		# between are recomputed during backpropagation, trading computation for memory on long sequences
+		self.checkpoint_steps = checkpoint_steps
+
+		# If set, the time stepping (fields, wave speed, and damping coefficients) is carried out in this data type, e.g.
+		# a half precision type to reduce memory traffic, while the parameters stay in the default data type
+		self.field_dtype = field_dtype
+
+	def _propagate(self, h1, h2, x, c, rho, b, A, B, probe_output):
+		"""Propagate the hidden state through the time steps of `x`, returning the final state and the outputs"""
+
+		batch_size = x.shape[0]
+
+		# Without autograd the output, which is either the probe values or the fields at each time step, is written
+		# into a preallocated tensor. With autograd each of those writes would be recorded as an in-place copy whose
+		# backward is the size of the whole output, so the steps are collected and stacked once at the end instead
+		preallocate = not torch.is_grad_enabled()
+		if preallocate:
+			if probe_output:
+				y = h1.new_empty((batch_size, x.size(1)) + self.probes[0].x.shape + (len(self.probes),),
+								 dtype=torch.get_default_dtype())
+			else:
+				y = h1.new_empty((batch_size, x.size(1)) + self.cell.geom.domain_shape)
+		else:
+			y_all = []
+
+		# Loop through time
+		for i, xi in enumerate(x.unbind(dim=1)):
+
+			# Propagate the fields
+			h1, h2 = self.cell(h1, h2, c, rho, (b, A, B))
+
+			# Inject source(s)
+			for source in self.sources:
+				h1 = source(h1, xi)
+
+			if probe_output:
+				# Measure probe(s)
+				yi = torch.stack([probe(h1) for probe in self.probes], dim=-1)
+			else:
+				# No probe, so just return the fields
+				yi = h1
+
+			if preallocate:
+				y[:, i] = yi
+			else:
+				y_all.append(yi)
+
+		if not preallocate:
+			y = torch.stack(y_all, dim=1)
+
+		return h1, h2, y
+
 	def forward(self, x, output_fields=False):
 		"""Propagate forward in time for the length of the inputs
 
@@ -35,38 +89,33 @@ class WaveRNN(torch.nn.Module):
 		# First dim is batch
 		batch_size = x.shape[0]
 
+		dtype = self.field_dtype if self.field_dtype is not None else torch.get_default_dtype()
+
 		# Init hidden states
 		hidden_state_shape = (batch_size,) + self.cell.geom.domain_shape
-		h1 = torch.zeros(hidden_state_shape, device=device)
-		h2 = torch.zeros(hidden_state_shape, device=device)
-		y_all = []
+		h1 = torch.zeros(hidden_state_shape, device=device, dtype=dtype)
+		h2 = torch.zeros(hidden_state_shape, device=device, dtype=dtype)
 
 		# Because these will not change with time we should pull them out here to avoid unnecessary calculations on each
-		# tme step, dramatically reducing the memory load from backpropagation
-		c = self.cell.geom.c
-		rho = self.cell.geom.rho
+		# tme step, dramatically reducing the memory load from backpropagation. They are cast to the field data type
+		# here so that neither the forward nor the backward of the time step runs in a mix of precisions
+		c = self.cell.geom.c.to(dtype)
+		rho = self.cell.geom.rho.to(dtype)
+		b, A, B = (coeff.to(dtype) for coeff in self.cell.linear_coeffs())
 
-		# Loop through time
-		for i, xi in enumerate(x.chunk(x.size(1), dim=1)):
+		probe_output = len(self.probes) > 0 and not output_fields
 
-			# Propagate the fields
-			h1, h2 = self.cell(h1, h2, c, rho)
-
-			# Inject source(s)
-			for source in self.sources:
-				h1 = source(h1, xi.squeeze(-1))
+		if not self.checkpoint_steps or not torch.is_grad_enabled():
+			_, _, y = self._propagate(h1, h2, x, c, rho, b, A, B, probe_output)
+			return y
 
-			if len(self.probes) > 0 and not output_fields:
-				# Measure probe(s)
-				probe_values = []
-				for probe in self.probes:
-					probe_values.append(probe(h1))
-				y_all.append(torch.stack(probe_values, dim=-1))
-			else:
-				# No probe, so just return the fields
-				y_all.append(h1)
+		def propagate_block(h1, h2, x, c, rho, b, A, B):
+			return self._propagate(h1, h2, x, c, rho, b, A, B, probe_output)
 
-		# Combine outputs into a single tensor
-		y = torch.stack(y_all, dim=1)
+		# Propagate in blocks of time steps, only keeping the hidden state at the start of each block for backprop
+		y_all = []
+		for x_block in x.split(self.checkpoint_steps, dim=1):
+			h1, h2, y = checkpoint(propagate_block, h1, h2, x_block, c, rho, b, A, B, use_reentrant=False)
+			y_all.append(y)
 
-		return y
+		return torch.cat(y_all, dim=1)
@@ -50,12 +50,19 @@ def train(model, optimizer, criterion, train_dl, test_dl,
 			columns=['time', 'epoch', 'fold', 'loss_train', 'loss_test', 'acc_train', 'acc_test', 'cm_train',
 					 'cm_test'])
 
+	# Batches are moved to the model's device as they are drawn, so that a data loader with pinned memory can overlap
+	# the host-to-device copies with computation
+	device = next(model.parameters()).device
+
 	t_start = time.time()
 	for epoch in range(0, N_epochs + 1):
 		t_epoch = time.time()
 
 		loss_iter = []
 		for num, (xb, yb) in enumerate(train_dl):
+			xb = xb.to(device, non_blocking=True)
+			yb = yb.to(device, non_blocking=True)
+
 			def closure():
 				optimizer.zero_grad()
 				yb_pred = normalize_power(model(xb).sum(dim=1))
@@ -69,7 +76,6 @@ def train(model, optimizer, criterion, train_dl, test_dl,
 					loss = criterion(yb_pred, yb.argmax(dim=1))
 			else:  # Take an optimization step
 				loss = optimizer.step(closure)
-				model.cell.geom.constrain_to_design_region()
 
 			loss_iter.append(loss.item())
 
@@ -79,6 +85,8 @@ def train(model, optimizer, criterion, train_dl, test_dl,
 			list_yb_pred = []
 			list_yb = []
 			for num, (xb, yb) in enumerate(train_dl):
+				xb = xb.to(device, non_blocking=True)
+				yb = yb.to(device, non_blocking=True)
 				yb_pred = normalize_power(model(xb).sum(dim=1))
 				list_yb_pred.append(yb_pred)
 				list_yb.append(yb)
@@ -87,7 +95,7 @@ def train(model, optimizer, criterion, train_dl, test_dl,
 
 			y_pred = torch.cat(list_yb_pred, dim=0)
 			y_truth = torch.cat(list_yb, dim=0)
-			cm_train = confusion_matrix(y_truth.argmax(dim=1).numpy(), y_pred.argmax(dim=1).numpy())
+			cm_train = confusion_matrix(y_truth.argmax(dim=1).cpu().numpy(), y_pred.argmax(dim=1).cpu().numpy())
 
 			acc_test_tmp = []
 			loss_test_tmp = []
@@ -96,6 +104,8 @@ def train(model, optimizer, criterion, train_dl, test_dl,
 			cm_test = None
 			if test_dl is not None:
 				for num, (xb, yb) in enumerate(test_dl):
+					xb = xb.to(device, non_blocking=True)
+					yb = yb.to(device, non_blocking=True)
 					yb_pred = normalize_power(model(xb).sum(dim=1))
 					list_yb_pred.append(yb_pred)
 					list_yb.append(yb)
@@ -105,7 +115,7 @@ def train(model, optimizer, criterion, train_dl, test_dl,
 
 				y_pred = torch.cat(list_yb_pred, dim=0)
 				y_truth = torch.cat(list_yb, dim=0)
-				cm_test = confusion_matrix(y_truth.argmax(dim=1).numpy(), y_pred.argmax(dim=1).numpy())
+				cm_test = confusion_matrix(y_truth.argmax(dim=1).cpu().numpy(), y_pred.argmax(dim=1).cpu().numpy())
 
 		print(
 			'Epoch %2d/%2d --- Elapsed Time:  %4.2f min | Training Loss:  %.4e | Testing Loss:  %.4e | Training Accuracy:  %.4f | Testing Accuracy:  %.4f' %
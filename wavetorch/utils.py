@@ -20,6 +20,17 @@ def set_dtype(dtype=None):
 		raise ValueError('Unsupported data type: %s; should be either float32 or float64' % dtype)
 
 
+def field_dtype(dtype=None):
+	"""Parse the data type used for the simulated fields (see `WaveRNN`); None uses the default data type
+	"""
+	if dtype is None:
+		return None
+	elif dtype in ['float32', 'float64', 'float16', 'bfloat16']:
+		return getattr(torch, dtype)
+	else:
+		raise ValueError('Unsupported field data type: %s; should be one of float32, float64, float16, or bfloat16' % dtype)
+
+
 def window_data(X, window_length):
 	"""Window the sample, X, to a length of window_length centered at the middle of the original sample
 	"""